@@ -11,6 +11,9 @@ class RecursiveResolveUI:
       - Loading: pixel mosaic breathes + grid overlay
       - Reveal: recursive subdivision to full-res + grid fades
       - Final snap: subtle flash
+
+    When `regions` (x, y, w, h boxes in base image pixels) is given, each box
+    animates independently and reveals as soon as its own result arrives.
     """
 
     def __init__(
@@ -27,10 +30,9 @@ class RecursiveResolveUI:
         grid_min_block=6,
         reveal_step_ms=90,
         flash_ms=170,
+        regions=None,
     ):
         self.base_original = base_pil.convert("RGB")
-        self.enhanced_original = None
-        self.enhanced_preview = None
 
         self.on_complete = on_complete
 
@@ -51,10 +53,6 @@ class RecursiveResolveUI:
         self._t0 = time.perf_counter()
 
         self._reveal_blocks = self._make_reveal_sequence(self.start_block_px)
-        self._reveal_i = 0
-        self._grid_fade = 1.0
-        self._flash_left_ms = 0
-        self._reveal_stepper_started = False
         self._on_complete_called = False
         self._running = True
         self._compare_button = None
@@ -72,6 +70,7 @@ class RecursiveResolveUI:
         self.root.minsize(720, 540)
 
         self.preview = self._fit_to_window(self.base_original, max_window)
+        self._regions = self._make_regions(regions)
 
         self.main = tk.Frame(self.root, bg="#0b0f14")
         self.main.pack(fill="both", expand=True)
@@ -89,7 +88,7 @@ class RecursiveResolveUI:
             16,
             16,
             anchor="nw",
-            text="ENHANCE: resolving...",
+            text=self._status_message(),
             fill="#a8c0ff",
             font=("Segoe UI", 12, "bold"),
         )
@@ -103,17 +102,25 @@ class RecursiveResolveUI:
     def mainloop(self):
         self.root.mainloop()
 
-    def set_enhanced_image(self, enhanced_pil):
+    def set_enhanced_image(self, enhanced_pil, region=0):
         """Call from main thread (or via root.after) when result is ready."""
-        self.enhanced_original = enhanced_pil.convert("RGB")
-        self.enhanced_preview = self._fit_exact(self.enhanced_original, self.preview.size)
-        self.state = "reveal"
-        self._reveal_i = 0
-        self._grid_fade = 1.0
-        self._flash_left_ms = 0
-        self._reveal_stepper_started = False
+        r = self._regions[region]
+        left, top, right, bottom = r["box"]
+        r["enhanced"] = self._fit_exact(enhanced_pil.convert("RGB"), (right - left, bottom - top))
+        r["state"] = "reveal"
+        r["reveal_i"] = 0
+        r["flash_left_ms"] = 0
+        r["stepper_started"] = False
         self._on_complete_called = False
-        self.canvas.itemconfigure(self._status_text, text="ENHANCE: applying detail passes...")
+        self._update_state()
+
+    def fail_region(self, region=0):
+        """Give up on one region: it settles back to the original pixels."""
+        r = self._regions[region]
+        r["enhanced"] = None
+        r["state"] = "final"
+        self._update_state()
+        self._maybe_complete()
 
     def close_after(self, ms=350):
         self.root.after(ms, self.root.destroy)
@@ -121,6 +128,61 @@ class RecursiveResolveUI:
     def stop(self):
         self._running = False
 
+    def _make_regions(self, regions):
+        bw, bh = self.base_original.size
+        pw, ph = self.preview.size
+        if not regions:
+            regions = [(0, 0, bw, bh)]
+
+        # Map base-image boxes onto the (downscaled) preview
+        sx, sy = pw / bw, ph / bh
+        out = []
+        for x, y, w, h in regions:
+            left = max(0, min(pw - 1, int(round(x * sx))))
+            top = max(0, min(ph - 1, int(round(y * sy))))
+            right = max(left + 1, min(pw, int(round((x + w) * sx))))
+            bottom = max(top + 1, min(ph, int(round((y + h) * sy))))
+            out.append({
+                "box": (left, top, right, bottom),
+                "state": "loading",
+                "enhanced": None,
+                "reveal_i": 0,
+                "flash_left_ms": 0,
+                "stepper_started": False,
+            })
+        return out
+
+    def _update_state(self):
+        states = {r["state"] for r in self._regions}
+        if states == {"final"}:
+            self.state = "final"
+        elif "reveal" in states:
+            self.state = "reveal"
+        else:
+            self.state = "loading"
+        self.canvas.itemconfigure(self._status_text, text=self._status_message())
+
+    def _status_message(self):
+        if len(self._regions) == 1:
+            return {
+                "loading": "ENHANCE: resolving...",
+                "reveal": "ENHANCE: applying detail passes...",
+                "final": "ENHANCE: complete.",
+            }[self.state]
+        if self.state == "final":
+            return "ENHANCE: complete."
+        done = sum(1 for r in self._regions if r["state"] == "final")
+        return f"ENHANCE: resolving regions... ({done}/{len(self._regions)})"
+
+    def _maybe_complete(self):
+        if self.state != "final":
+            return
+        if not any(r["enhanced"] is not None for r in self._regions):
+            return
+        if self.on_complete and not self._on_complete_called:
+            self._on_complete_called = True
+            self.root.after(self.flash_ms, self._show_compare_button)
+
     def _make_reveal_sequence(self, start_block):
         seq = [max(1, start_block)]
         while seq[-1] > 1:
@@ -181,30 +243,39 @@ class RecursiveResolveUI:
         return Image.blend(img, white, 0.25 * a)
 
     def _render_frame(self):
-        if self.state == "loading":
-            frame = self._apply_breathe(self.preview, self.breathe_strength)
+        if len(self._regions) == 1 and self._regions[0]["box"] == (0, 0) + self.preview.size:
+            return self._render_region(self._regions[0], self.preview)
+
+        frame = self.preview.copy()
+        for r in self._regions:
+            tile = self._render_region(r, self.preview.crop(r["box"]))
+            frame.paste(tile, r["box"][:2])
+        return frame
+
+    def _render_region(self, region, tile):
+        if region["state"] == "loading":
+            frame = self._apply_breathe(tile, self.breathe_strength)
             frame = self._overlay_grid(frame, self.start_block_px, self.grid_alpha)
             return frame
 
-        if self.state == "reveal":
-            base = self.enhanced_preview if self.enhanced_preview else self.preview
-            block = self._reveal_blocks[min(self._reveal_i, len(self._reveal_blocks) - 1)]
+        base = region["enhanced"] if region["enhanced"] is not None else tile
+        if region["state"] == "reveal":
+            block = self._reveal_blocks[min(region["reveal_i"], len(self._reveal_blocks) - 1)]
             frame = self._pixelate(base, block)
 
             steps = max(1, len(self._reveal_blocks) - 1)
-            progress = min(1.0, self._reveal_i / steps)
+            progress = min(1.0, region["reveal_i"] / steps)
             smooth = progress * progress * (3.0 - 2.0 * progress)
-            self._grid_fade = 1.0 - smooth
-            frame = self._overlay_grid(frame, block, int(self.grid_alpha * self._grid_fade))
+            grid_fade = 1.0 - smooth
+            frame = self._overlay_grid(frame, block, int(self.grid_alpha * grid_fade))
             if smooth > 0.1:
                 blend = (smooth - 0.1) / 0.9
                 frame = Image.blend(frame, base, blend)
 
-            frame = self._apply_flash(frame, self._flash_left_ms)
+            frame = self._apply_flash(frame, region["flash_left_ms"])
             return frame
 
-        base = self.enhanced_preview if self.enhanced_preview else self.preview
-        frame = self._apply_flash(base, self._flash_left_ms)
+        frame = self._apply_flash(base, region["flash_left_ms"])
         return frame
 
     def _redraw_centered(self):
@@ -259,8 +330,9 @@ class RecursiveResolveUI:
             self._running = False
             return
 
-        if self._flash_left_ms > 0:
-            self._flash_left_ms -= self.dt_ms
+        for r in self._regions:
+            if r["flash_left_ms"] > 0:
+                r["flash_left_ms"] -= self.dt_ms
 
         frame = self._render_frame()
         self._last_render = frame
@@ -268,32 +340,31 @@ class RecursiveResolveUI:
         if not self._running:
             return
 
-        if self.state == "reveal" and not self._reveal_stepper_started:
-            self._reveal_stepper_started = True
-            self.root.after(self.reveal_step_ms, self._reveal_step)
+        for i, r in enumerate(self._regions):
+            if r["state"] == "reveal" and not r["stepper_started"]:
+                r["stepper_started"] = True
+                self.root.after(self.reveal_step_ms, lambda i=i: self._reveal_step(i))
 
         try:
             self.root.after(self.dt_ms, self._tick)
         except tk.TclError:
             self._running = False
 
-    def _reveal_step(self):
-        if self.state != "reveal":
+    def _reveal_step(self, region=0):
+        r = self._regions[region]
+        if r["state"] != "reveal":
             return
 
-        self._reveal_i += 1
-
-        if self._reveal_i >= len(self._reveal_blocks) - 1:
-            self._flash_left_ms = self.flash_ms
-            self.canvas.itemconfigure(self._status_text, text="ENHANCE: complete.")
-            self.state = "final"
+        r["reveal_i"] += 1
 
-            if self.on_complete and not self._on_complete_called:
-                self._on_complete_called = True
-                self.root.after(self.flash_ms, self._show_compare_button)
+        if r["reveal_i"] >= len(self._reveal_blocks) - 1:
+            r["flash_left_ms"] = self.flash_ms
+            r["state"] = "final"
+            self._update_state()
+            self._maybe_complete()
             return
 
-        self.root.after(self.reveal_step_ms, self._reveal_step)
+        self.root.after(self.reveal_step_ms, lambda: self._reveal_step(region))
 
     def _show_compare_button(self):
         if not self.on_complete or self._compare_button is not None:
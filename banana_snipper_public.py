@@ -5,9 +5,13 @@ import numpy as np
 import os
 import time
 import glob
+import queue
+import urllib.parse
+import urllib.request
 import tkinter as tk
 from tkinter import ttk
 import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from google import genai
 from PIL import Image, ImageTk, ImageOps
 from animation_utils import RecursiveResolveUI, ComparisonUI
@@ -19,6 +23,18 @@ DEFAULT_SNAPSHOT_DIR = os.getenv(
     "NANO_BANANA_SNAPSHOT_DIR",
     os.path.join(os.path.expanduser("~"), "Pictures", "VLC Snapshots"),
 )
+# Cap on in-flight Vertex AI requests when enhancing several regions at once
+MAX_CONCURRENCY = max(1, int(os.getenv("NANO_BANANA_MAX_CONCURRENCY", "4")))
+
+# Clip mode: seconds of video around the paused position, and how different
+# (mean absolute grey level, 0-255) a frame must be from the last kept one
+CLIP_SECONDS = float(os.getenv("NANO_BANANA_CLIP_SECONDS", "1.0"))
+CLIP_DIFF_THRESHOLD = float(os.getenv("NANO_BANANA_CLIP_DIFF_THRESHOLD", "2.0"))
+CLIP_QUEUE_SIZE = 8
+# A first frame this far before the window start means the seek did not happen
+CLIP_SEEK_TOLERANCE_MS = 1000
+
+ENHANCE_PROMPT = "You are a professional image enhancer. Analyze this movie frame. Generate a high-fidelity, 4K remastered version of this specific scene. Keep the character identity and lighting exactly the same, but sharpen details, remove noise, and improve texture quality. Output: A photorealistic replica of the input. "
 
 # FORCE Windows to give us the real 4K/Retina resolution
 try:
@@ -90,47 +106,35 @@ def fix_orientation(image_path, vlc_orientation="Normal"):
     fixed_img.save(image_path)
     return image_path
 
-def select_crop_with_black_bars(image_path):
+def letterbox_for_screen(original_img):
     # 1. Get standard screen resolution
     user32 = ctypes.windll.user32
     screen_w, screen_h = user32.GetSystemMetrics(0), user32.GetSystemMetrics(1)
 
-    # 2. Load the original vertical image
-    original_img = cv2.imread(image_path)
-    if original_img is None:
-        return None
-
     orig_h, orig_w = original_img.shape[:2]
 
-    # 3. Calculate the Scaling Factor (fit within screen)
+    # 2. Calculate the Scaling Factor (fit within screen)
     # We want to fit the image inside the screen without stretching
     scale = min(screen_w / orig_w, screen_h / orig_h)
     new_w = int(orig_w * scale)
     new_h = int(orig_h * scale)
 
-    # 4. Resize the image (keeping aspect ratio)
+    # 3. Resize the image (keeping aspect ratio)
     resized_img = cv2.resize(original_img, (new_w, new_h))
 
-    # 5. Create the Black Canvas (Fullscreen)
+    # 4. Create the Black Canvas (Fullscreen)
     canvas = np.zeros((screen_h, screen_w, 3), dtype=np.uint8)
 
-    # 6. Calculate offsets to center the image
+    # 5. Calculate offsets to center the image
     x_offset = (screen_w - new_w) // 2
     y_offset = (screen_h - new_h) // 2
 
-    # 7. Paste the resized image onto the canvas
+    # 6. Paste the resized image onto the canvas
     canvas[y_offset:y_offset + new_h, x_offset:x_offset + new_w] = resized_img
 
-    # 8. Open the Fullscreen Window
-    window_name = "Nano Banana Selector (Enter to Confirm)"
-    cv2.namedWindow(window_name, cv2.WND_PROP_FULLSCREEN)
-    cv2.setWindowProperty(window_name, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
-    cv2.setWindowProperty(window_name, cv2.WND_PROP_TOPMOST, 1)
-
-    # 9. Let user draw the rectangle on the CANVAS
-    r = cv2.selectROI(window_name, canvas, fromCenter=False, showCrosshair=True)
-    cv2.destroyAllWindows()
+    return canvas, scale, x_offset, y_offset
 
+def map_selection_to_image(r, scale, x_offset, y_offset, orig_w, orig_h):
     # --- THE TRAP: COORDINATE MAPPING ---
     # The user drew on the screen (canvas), but we need the coordinates
     # for the ORIGINAL high-res image.
@@ -168,12 +172,44 @@ def select_crop_with_black_bars(image_path):
         print("Selection was outside the image area!")
         return None
 
-    # 6. Crop
-    final_crop = original_img[real_y:real_y_end, real_x:real_x_end]
+    return real_x, real_y, final_w, final_h
+
+def select_regions_with_black_bars(image_path):
+    """
+    Returns (original_img, regions) where regions is a list of (x, y, w, h)
+    boxes in original image pixels. The image is decoded once; callers slice
+    crops out of it instead of re-reading the file per region.
+    """
+    # 1. Load the original image
+    original_img = cv2.imread(image_path)
+    if original_img is None:
+        return None, []
 
-    return final_crop
+    orig_h, orig_w = original_img.shape[:2]
 
-def vibe_snip(folder_path, vlc_orientation="Normal"):
+    # 2. Letterbox it onto a fullscreen canvas
+    canvas, scale, x_offset, y_offset = letterbox_for_screen(original_img)
+
+    # 3. Open the Fullscreen Window
+    window_name = "Nano Banana Selector (Enter to Add, Esc to Finish)"
+    cv2.namedWindow(window_name, cv2.WND_PROP_FULLSCREEN)
+    cv2.setWindowProperty(window_name, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
+    cv2.setWindowProperty(window_name, cv2.WND_PROP_TOPMOST, 1)
+
+    # 4. Let user draw any number of rectangles on the CANVAS
+    rects = cv2.selectROIs(window_name, canvas, fromCenter=False, showCrosshair=True)
+    cv2.destroyAllWindows()
+
+    # 5. Map each one back onto the original image
+    regions = []
+    for r in rects:
+        region = map_selection_to_image(tuple(int(v) for v in r), scale, x_offset, y_offset, orig_w, orig_h)
+        if region is not None:
+            regions.append(region)
+
+    return original_img, regions
+
+def find_snapshot(folder_path, vlc_orientation="Normal"):
     # 1. FIND THE FILE
     image_path = get_latest_file(folder_path)
 
@@ -181,16 +217,24 @@ def vibe_snip(folder_path, vlc_orientation="Normal"):
         print("Error: VLC didn't save the file in time (or saved it somewhere else).")
         print("Please check: Tools -> Preferences -> Video -> Directory")
         input("Press Enter to exit...")
-        return
+        return None
 
     # NEW: Fix orientation before processing
-    fix_orientation(image_path, vlc_orientation)
+    return fix_orientation(image_path, vlc_orientation)
+
+def vibe_snip(folder_path, vlc_orientation="Normal"):
+    # 1. FIND THE FILE
+    image_path = find_snapshot(folder_path, vlc_orientation)
+    if not image_path:
+        return
 
     # 2. SELECTION (Smart Letterboxing)
-    crop = select_crop_with_black_bars(image_path)
+    original_img, regions = select_regions_with_black_bars(image_path)
 
-    if crop is not None:
+    if len(regions) == 1:
         print("Enhancing selection...")
+        x, y, w, h = regions[0]
+        crop = original_img[y:y + h, x:x + w]
 
         # Generate permanent crop path: name_crop.png
         folder, filename = os.path.split(image_path)
@@ -202,17 +246,48 @@ def vibe_snip(folder_path, vlc_orientation="Normal"):
 
         # Send original path so we can save the result next to it
         send_to_banana(save_crop_path, image_path)
+    elif regions:
+        print(f"Enhancing {len(regions)} selections...")
+        send_regions_to_banana(original_img, regions, image_path)
     else:
         print("Selection cancelled.")
 
-def send_to_banana(crop_path, original_full_path):
-    # 1. SETUP ENVIRONMENT
-    client = genai.Client(
+def make_client():
+    return genai.Client(
         vertexai=True,
         project=PROJECT_ID,
         location=LOCATION
     )
 
+def enhance_image(client, image):
+    """Send one PIL image to the model. Returns the enhanced PIL image or None."""
+    response = client.models.generate_content(
+        model=MODEL_ID,
+        contents=[ENHANCE_PROMPT, image]
+    )
+
+    candidates = getattr(response, "candidates", None)
+    if not candidates:
+        print("No candidates returned from the model.")
+        return None
+
+    content = getattr(candidates[0], "content", None)
+    parts = getattr(content, "parts", []) if content else []
+    image_part = next((part for part in parts if getattr(part, "inline_data", None)), None)
+
+    if not image_part:
+        for part in parts:
+            if getattr(part, "text", None):
+                print(part.text)
+        print("No image part returned.")
+        return None
+
+    return image_part.as_image()
+
+def send_to_banana(crop_path, original_full_path):
+    # 1. SETUP ENVIRONMENT
+    client = make_client()
+
     # Pre-calculate save path
     folder, filename = os.path.split(original_full_path)
     name, ext = os.path.splitext(filename)
@@ -234,31 +309,13 @@ def send_to_banana(crop_path, original_full_path):
     def gemini_worker():
         print("Nano Enhancement Protocol: Contacting Central Server...")
         try:
-            prompt = "You are a professional image enhancer. Analyze this movie frame. Generate a high-fidelity, 4K remastered version of this specific scene. Keep the character identity and lighting exactly the same, but sharpen details, remove noise, and improve texture quality. Output: A photorealistic replica of the input. "
             with Image.open(crop_path) as image_file:
                 image_file.load()
-                response = client.models.generate_content(
-                    model=MODEL_ID,
-                    contents=[prompt, image_file]
-                )
-
-            candidates = getattr(response, "candidates", None)
-            if not candidates:
-                print("No candidates returned from the model.")
-                return
+                final_img = enhance_image(client, image_file)
 
-            content = getattr(candidates[0], "content", None)
-            parts = getattr(content, "parts", []) if content else []
-            image_part = next((part for part in parts if getattr(part, "inline_data", None)), None)
-
-            if not image_part:
-                for part in parts:
-                    if getattr(part, "text", None):
-                        print(part.text)
-                print("No image part returned.")
+            if final_img is None:
                 return
 
-            final_img = image_part.as_image()
             final_img.save(save_path)
             print(f"Enhancement Downloaded: {save_path}")
 
@@ -277,8 +334,275 @@ def send_to_banana(crop_path, original_full_path):
 
     ui.mainloop()
 
+def send_regions_to_banana(original_img, regions, original_full_path):
+    # 1. SETUP ENVIRONMENT (one client shared by every region)
+    client = make_client()
+
+    folder, filename = os.path.split(original_full_path)
+    name, ext = os.path.splitext(filename)
+    save_path = os.path.join(folder, f"{name}_enhanced{ext}")
+
+    # 2. INITIALIZE ANIMATION GUI
+    # Every region is a view into the same decoded frame
+    base_pil = Image.fromarray(cv2.cvtColor(original_img, cv2.COLOR_BGR2RGB))
+    ui = RecursiveResolveUI(base_pil, regions=regions)
+    ui.root.attributes("-topmost", True)
+
+    results = {}
+
+    def open_comparison():
+        # Composite every enhanced region back onto the full frame
+        composite = base_pil.copy()
+        for i, (x, y, w, h) in enumerate(regions):
+            if i in results:
+                composite.paste(results[i].resize((w, h), Image.Resampling.LANCZOS), (x, y))
+        composite.save(save_path)
+        print(f"Composite saved: {save_path}")
+        ComparisonUI(ui.root, original_full_path, save_path)
+        ui.root.attributes("-topmost", False)
+
+    ui.on_complete = open_comparison
+
+    # 3. DEFINE GEMINI WORKERS
+    def enhance_region(i):
+        x, y, w, h = regions[i]
+        crop = original_img[y:y + h, x:x + w]
+
+        crop_path = os.path.join(folder, f"{name}_crop{i + 1}{ext}")
+        cv2.imwrite(crop_path, crop)
+        print(f"Crop saved: {crop_path}")
+
+        final_img = enhance_image(client, base_pil.crop((x, y, x + w, y + h)))
+        if final_img is None:
+            return None
+
+        region_path = os.path.join(folder, f"{name}_enhanced{i + 1}{ext}")
+        final_img.save(region_path)
+        print(f"Enhancement Downloaded: {region_path}")
+        return final_img.convert("RGB")
+
+    def gemini_worker():
+        print(f"Nano Enhancement Protocol: Contacting Central Server ({len(regions)} regions)...")
+        with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENCY, len(regions))) as pool:
+            futures = {pool.submit(enhance_region, i): i for i in range(len(regions))}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    final_pil = future.result()
+                except Exception as e:
+                    print(f"CSI Protocol Error (region {i + 1}): {e}")
+                    final_pil = None
+
+                if final_pil is None:
+                    ui.root.after(0, lambda i=i: ui.fail_region(i))
+                    continue
+
+                results[i] = final_pil
+                ui.root.after(0, lambda img=final_pil, i=i: ui.set_enhanced_image(img, i))
+
+        if not results:
+            print("No region could be enhanced.")
+            ui.root.after(0, ui.root.destroy)
+
+    # 4. START THE BRAIN
+    t = threading.Thread(target=gemini_worker)
+    t.daemon = True
+    t.start()
+
+    ui.mainloop()
+
+def media_uri_to_path(media_uri):
+    # VLC hands us a URI (file:///C:/My%20Movie.mp4); OpenCV wants a path
+    parsed = urllib.parse.urlparse(media_uri)
+    if parsed.scheme == "file":
+        # UNC shares arrive as file://server/share/movie.mp4
+        if parsed.netloc and parsed.netloc.lower() != "localhost":
+            return urllib.request.url2pathname("//" + parsed.netloc + parsed.path)
+        return urllib.request.url2pathname(parsed.path)
+    return media_uri
+
+def iter_clip_frames(media_path, center_ms, window_ms, stats):
+    """Yield (timestamp_ms, frame) for every decoded frame in the window."""
+    # Only time spent inside OpenCV counts; waiting on the consumer does not
+    t = time.perf_counter()
+    cap = cv2.VideoCapture(media_path)
+    stats["decode_s"] += time.perf_counter() - t
+    if not cap.isOpened():
+        print(f"Could not open media: {media_path}")
+        return
+
+    start_ms = max(0.0, center_ms - window_ms / 2)
+    end_ms = center_ms + window_ms / 2
+    try:
+        # Without a working seek we would read the whole video up to here
+        t = time.perf_counter()
+        seeked = start_ms <= 0 or cap.set(cv2.CAP_PROP_POS_MSEC, start_ms)
+        stats["decode_s"] += time.perf_counter() - t
+        if not seeked:
+            print(f"Could not seek to {start_ms / 1000:.2f}s in: {media_path}")
+            return
+
+        first = True
+        while True:
+            t = time.perf_counter()
+            ok, frame = cap.read()
+            stats["decode_s"] += time.perf_counter() - t
+            if not ok:
+                break
+            ts = cap.get(cv2.CAP_PROP_POS_MSEC)
+            if first and ts < start_ms - CLIP_SEEK_TOLERANCE_MS:
+                print(f"Could not seek to {start_ms / 1000:.2f}s in: {media_path}")
+                return
+            first = False
+            if ts > end_ms:
+                break
+            if ts < start_ms:
+                continue
+            yield ts, frame
+    finally:
+        cap.release()
+
+def prefetch(iterable, maxsize=CLIP_QUEUE_SIZE):
+    """Run a generator on a background thread behind a bounded queue."""
+    q = queue.Queue(maxsize=maxsize)
+    done = object()
+
+    def producer():
+        try:
+            for item in iterable:
+                q.put(item)
+        except Exception as e:
+            print(f"Decode Error: {e}")
+        finally:
+            q.put(done)
+
+    t = threading.Thread(target=producer)
+    t.daemon = True
+    t.start()
+
+    while True:
+        item = q.get()
+        if item is done:
+            return
+        yield item
+
+def crop_frames(frames, region, stats):
+    x, y, w, h = region
+    for ts, frame in frames:
+        stats["decoded"] += 1
+        # Copy so the full decoded frame can be released straight away
+        yield ts, frame[y:y + h, x:x + w].copy()
+
+def drop_near_duplicates(frames, threshold, stats):
+    # Compare a small greyscale thumbnail against the last frame we kept
+    last = None
+    for ts, frame in frames:
+        grey = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        thumb = cv2.resize(grey, (64, 64), interpolation=cv2.INTER_AREA).astype(np.int16)
+        if last is not None and np.abs(thumb - last).mean() < threshold:
+            continue
+        last = thumb
+        stats["kept"] += 1
+        yield ts, frame
+
+def enhance_clip_frames(client, frames, out_dir, stats):
+    def enhance_frame(ts, crop):
+        stem = os.path.join(out_dir, f"{int(ts):08d}ms")
+        cv2.imwrite(f"{stem}_crop.png", crop)
+        final_img = enhance_image(client, Image.fromarray(cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)))
+        if final_img is None:
+            return False
+        final_img.save(f"{stem}_enhanced.png")
+        print(f"Enhancement Downloaded: {stem}_enhanced.png")
+        return True
+
+    def collect(finished):
+        for future in finished:
+            try:
+                if future.result():
+                    stats["enhanced"] += 1
+            except Exception as e:
+                print(f"CSI Protocol Error: {e}")
+
+    # Never hold more than a couple of frames per worker, however long the clip
+    max_in_flight = MAX_CONCURRENCY * 2
+    in_flight = set()
+    t0 = None
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENCY) as pool:
+        for ts, crop in frames:
+            if len(in_flight) >= max_in_flight:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(finished)
+            if t0 is None:
+                t0 = time.perf_counter()
+            in_flight.add(pool.submit(enhance_frame, ts, crop))
+        collect(wait(in_flight).done)
+
+    # From the first submit to the last completion
+    if t0 is not None:
+        stats["enhance_s"] = time.perf_counter() - t0
+
+def clip_snip(folder_path, vlc_orientation, media_uri, time_ms):
+    # 1. FIND THE SNAPSHOT (used to pick the region)
+    image_path = find_snapshot(folder_path, vlc_orientation)
+    if not image_path:
+        return
+
+    # 2. SELECTION (one region, applied to every frame)
+    snapshot, regions = select_regions_with_black_bars(image_path)
+    if not regions:
+        print("Selection cancelled.")
+        return
+    if len(regions) > 1:
+        print("Clip mode uses the first region only.")
+
+    # 3. MAP THE REGION ONTO THE VIDEO'S FRAME SIZE
+    media_path = media_uri_to_path(media_uri)
+    cap = cv2.VideoCapture(media_path)
+    frame_w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    frame_h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    cap.release()
+    if frame_w <= 0 or frame_h <= 0:
+        print(f"Could not open media: {media_path}")
+        input("Press Enter to exit...")
+        return
+
+    snap_h, snap_w = snapshot.shape[:2]
+    x, y, w, h = regions[0]
+    sx, sy = frame_w / snap_w, frame_h / snap_h
+    region = (int(x * sx), int(y * sy), max(1, int(w * sx)), max(1, int(h * sy)))
+
+    folder, filename = os.path.split(image_path)
+    name, _ = os.path.splitext(filename)
+    out_dir = os.path.join(folder, f"{name}_clip")
+    os.makedirs(out_dir, exist_ok=True)
+
+    # 4. STREAM: decode -> crop -> drop duplicates -> enhance
+    print(f"Nano Enhancement Protocol: Clip mode ({CLIP_SECONDS:g}s around {float(time_ms) / 1000:.2f}s)...")
+    stats = {"decoded": 0, "kept": 0, "enhanced": 0, "decode_s": 0.0, "enhance_s": 0.0}
+    client = make_client()
+    t0 = time.perf_counter()
+
+    frames = prefetch(iter_clip_frames(media_path, float(time_ms), CLIP_SECONDS * 1000, stats))
+    frames = crop_frames(frames, region, stats)
+    frames = drop_near_duplicates(frames, CLIP_DIFF_THRESHOLD, stats)
+    enhance_clip_frames(client, frames, out_dir, stats)
+
+    elapsed = max(1e-6, time.perf_counter() - t0)
+    decode_s = max(1e-6, stats["decode_s"])
+    enhance_s = max(1e-6, stats["enhance_s"])
+    print(f"Decode:   {stats['decoded']} frames in {decode_s:.2f}s ({stats['decoded'] / decode_s:.1f} frames/sec)")
+    print(f"Dedupe:   kept {stats['kept']} of {stats['decoded']} frames")
+    print(f"Enhance:  {stats['enhanced']} frames in {enhance_s:.1f}s ({stats['enhanced'] / enhance_s:.2f} frames/sec)")
+    print(f"Pipeline: {elapsed:.1f}s end-to-end ({stats['enhanced'] / elapsed:.2f} frames/sec enhanced)")
+    print(f"Results saved: {out_dir}")
+    input("Press Enter to exit...")
+
 if __name__ == "__main__":
-    if len(sys.argv) > 2:
+    if len(sys.argv) > 5 and sys.argv[3] == "clip":
+        # Case: Clip mode via VLC (Folder, Orientation, Mode, Media URI, Time ms)
+        clip_snip(sys.argv[1], sys.argv[2], sys.argv[4], sys.argv[5])
+    elif len(sys.argv) > 2:
         # Case: Passed via VLC (Folder, Orientation)
         vibe_snip(sys.argv[1], sys.argv[2])
     elif len(sys.argv) > 1:
@@ -7,13 +7,17 @@ function activate()
     -- 1. HARDCODED TARGET FOLDER
     -- We explicitly tell Python to look here.
     local target_dir = "C:\\Users\\YOUR_USER\\Pictures\\VLC Snapshots"
+    -- "snapshot" enhances the paused frame, "clip" enhances the frames around it
+    local mode = "snapshot"
 
     local vout = vlc.object.vout()
     if vout then
         -- 2. GET MEDIA ORIENTATION (For Sideways Videos)
         local orientation = "Normal"
+        local media_uri = ""
         local item = vlc.input.item()
         if item then
+            media_uri = item:uri() or ""
             local info = item:info()
             for cat, content in pairs(info) do
                 for name, value in pairs(content) do
@@ -25,6 +29,13 @@ function activate()
             end
         end
 
+        -- Playback position in ms (VLC 3 reports "time" in microseconds)
+        local time_ms = 0
+        local input = vlc.object.input()
+        if input then
+            time_ms = math.floor(vlc.var.get(input, "time") / 1000)
+        end
+
         -- 3. TRIGGER SNAPSHOT
         -- Only pause if we are currently playing.
         -- This prevents the "toggle" behavior when users manually pause first.
@@ -40,8 +51,9 @@ function activate()
         local python_exe = "python"
         local script_path = "C:\\Path\\To\\banana_snipper.py"
         
-        -- Pass FOLDER and ORIENTATION
+        -- Pass FOLDER, ORIENTATION, MODE, MEDIA and TIME
         local cmd = 'start "" "' .. python_exe .. '" "' .. script_path .. '" "' .. target_dir .. '" "' .. orientation .. '"'
+            .. ' "' .. mode .. '" "' .. media_uri .. '" "' .. tostring(time_ms) .. '"'
         
         os.execute(cmd)
         